@@ -1,18 +1,13 @@
+#define _POSIX_C_SOURCE 200809L
+
 #include <mpi.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <limits.h>
 #include <string.h>
+#include <unistd.h>
 
-static int next_power_of_two(int n)
-{
-    int p = 1;
-    while (p < n)
-    {
-        p <<= 1;
-    }
-    return p;
-}
+#include "../common/bitonic_common.h"
 
 static int int_compare(const void *a, const void *b)
 {
@@ -25,74 +20,16 @@ static int int_compare(const void *a, const void *b)
     return 0;
 }
 
-static int read_input_rank0(const char *path, int **data_out)
-{
-    FILE *fp = fopen(path, "r");
-    if (!fp)
-    {
-        perror("Failed to open input file");
-        return -1;
-    }
-
-    int capacity = 1024;
-    int size = 0;
-    int *buffer = malloc(capacity * sizeof(int));
-    if (!buffer)
-    {
-        fclose(fp);
-        fprintf(stderr, "Memory allocation failed\n");
-        return -1;
-    }
-
-    while (1)
-    {
-        int value;
-        int scanned = fscanf(fp, "%d", &value);
-        if (scanned == 1)
-        {
-            if (size == capacity)
-            {
-                capacity *= 2;
-                int *tmp = realloc(buffer, capacity * sizeof(int));
-                if (!tmp)
-                {
-                    free(buffer);
-                    fclose(fp);
-                    fprintf(stderr, "Memory allocation failed\n");
-                    return -1;
-                }
-                buffer = tmp;
-            }
-            buffer[size++] = value;
-        }
-        else if (scanned == EOF)
-        {
-            break;
-        }
-        else
-        {
-            free(buffer);
-            fclose(fp);
-            fprintf(stderr, "Invalid data in input file\n");
-            return -1;
-        }
-    }
-
-    fclose(fp);
-    *data_out = buffer;
-    return size;
-}
-
-// Bitonic comparator: compare two elements and optionally swap based on direction.
+// Bitonic comparator: order two elements by direction without a data-dependent branch.
 // direction = 1 means ascending, 0 means descending.
 static void compare_and_swap(int *a, int *b, int direction)
 {
-    if ((direction == 1 && *a > *b) || (direction == 0 && *a < *b))
-    {
-        int tmp = *a;
-        *a = *b;
-        *b = tmp;
-    }
+    int x = *a;
+    int y = *b;
+    int lo = x < y ? x : y;
+    int hi = x < y ? y : x;
+    *a = direction ? lo : hi;
+    *b = direction ? hi : lo;
 }
 
 // Bitonic merge: merge two bitonic sequences into a single bitonic sequence.
@@ -187,51 +124,66 @@ static void distributed_bitonic(int *local, int local_n, int rank, int world_siz
     }
 }
 
-static void write_output_rank0(const char *path, const int *data, int count)
+// Bottom-up merge of the sorted runs of run_length elements in data, ping-ponging
+// between data and scratch. Returns whichever of the two buffers holds the result.
+static int *merge_sorted_runs(int *data, int *scratch, int count, int run_length)
 {
-    FILE *fp = fopen(path, "w");
-    if (!fp)
-    {
-        perror("Failed to open output file");
-        return;
-    }
-    for (int i = 0; i < count; ++i)
-    {
-        fprintf(fp, "%d%s", data[i], (i + 1 == count) ? "" : " ");
-    }
-    fprintf(fp, "\n");
-    fclose(fp);
-}
+    int *current = data;
+    int *next = scratch;
 
-int main(int argc, char **argv)
-{
-    MPI_Init(&argc, &argv);
-
-    int rank, world_size;
-    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
-    MPI_Comm_size(MPI_COMM_WORLD, &world_size);
-
-    if (argc < 2)
+    for (int merge_width = run_length; merge_width < count; merge_width *= 2)
     {
-        if (rank == 0)
+        int res_idx = 0;
+        for (int base = 0; base < count; base += 2 * merge_width)
         {
-            fprintf(stderr, "Usage: %s <input_file>\n", argv[0]);
+            int left_end = base + merge_width;
+            int right_end = (base + 2 * merge_width < count) ? base + 2 * merge_width : count;
+            if (left_end > count)
+                left_end = count;
+
+            int l = base, r = left_end;
+            while (l < left_end && r < right_end)
+            {
+                if (current[l] <= current[r])
+                {
+                    next[res_idx++] = current[l++];
+                }
+                else
+                {
+                    next[res_idx++] = current[r++];
+                }
+            }
+            while (l < left_end)
+                next[res_idx++] = current[l++];
+            while (r < right_end)
+                next[res_idx++] = current[r++];
         }
-        MPI_Finalize();
-        return 1;
+
+        // Swap pointers
+        int *swap = current;
+        current = next;
+        next = swap;
     }
 
+    return current;
+}
+
+// Sort one input file across all ranks; rank 0 prints its timing block and appends the sorted values to out.
+static void sort_dataset(const char *path, int warmup, int repeats, int rank, int world_size, FILE *out)
+{
     int *global_data = NULL;
     int original_count = 0;
     int padded_count = 0;
+    unsigned long long fingerprint = 0;
 
     if (rank == 0)
     {
-        original_count = read_input_rank0(argv[1], &global_data);
+        original_count = read_input(path, &global_data);
         if (original_count <= 0)
         {
             MPI_Abort(MPI_COMM_WORLD, 1);
         }
+        fingerprint = value_fingerprint(global_data, original_count);
 
         padded_count = next_power_of_two(original_count);
         while (padded_count % world_size != 0)
@@ -265,105 +217,139 @@ int main(int argc, char **argv)
         MPI_Abort(MPI_COMM_WORLD, 1);
     }
 
-    MPI_Scatter(global_data, local_n, MPI_INT, local_data, local_n, MPI_INT, 0, MPI_COMM_WORLD);
-
-    MPI_Barrier(MPI_COMM_WORLD);
-    double start = MPI_Wtime();
-
-    // Each process sorts its local data
-    bitonic_sort_recursive(local_data, 0, local_n, 1);
-
-    // Now perform a simple merge-based distributed sort
-    // All processes send their sorted data to rank 0, which merges them
+    // Gather and merge buffers are allocated once and reused by every run.
     int *all_data = NULL;
+    int *temp_buf = NULL;
+    int *sorted = NULL;
+    double *samples = NULL;
     if (rank == 0)
     {
-        all_data = malloc(padded_count * sizeof(int));
-        if (!all_data)
+        if (world_size > 1)
+        {
+            all_data = malloc(padded_count * sizeof(int));
+            temp_buf = malloc(padded_count * sizeof(int));
+        }
+        samples = malloc(repeats * sizeof(double));
+        if ((world_size > 1 && (!all_data || !temp_buf)) || !samples)
         {
             fprintf(stderr, "Memory allocation failed\n");
             MPI_Abort(MPI_COMM_WORLD, 1);
         }
     }
 
-    MPI_Gather(local_data, local_n, MPI_INT, all_data, local_n, MPI_INT, 0, MPI_COMM_WORLD);
-
-    if (rank == 0)
+    // Every run, warm-up or timed, re-scatters the unsorted input.
+    for (int run = -warmup; run < repeats; ++run)
     {
-        // Merge all the sorted subarrays using temp buffer
-        int *temp_buf = malloc(padded_count * sizeof(int));
-        if (!temp_buf)
-        {
-            fprintf(stderr, "Memory allocation failed\n");
-            MPI_Abort(MPI_COMM_WORLD, 1);
-        }
+        MPI_Scatter(global_data, local_n, MPI_INT, local_data, local_n, MPI_INT, 0, MPI_COMM_WORLD);
+
+        MPI_Barrier(MPI_COMM_WORLD);
+        double start = MPI_Wtime();
 
-        // Simple merge: repeatedly merge pairs
-        int *current = all_data;
-        int *next = temp_buf;
+        // Each process sorts its local data
+        bitonic_sort_recursive(local_data, 0, local_n, 1);
 
-        for (int merge_width = local_n; merge_width < padded_count; merge_width *= 2)
+        // Now perform a simple merge-based distributed sort
+        // All processes send their sorted data to rank 0, which merges them
+        if (world_size == 1)
         {
-            int res_idx = 0;
-            for (int base = 0; base < padded_count; base += 2 * merge_width)
-            {
-                int left_end = base + merge_width;
-                int right_end = (base + 2 * merge_width < padded_count) ? base + 2 * merge_width : padded_count;
-                if (left_end > padded_count)
-                    left_end = padded_count;
+            // A single rank already holds the whole sorted sequence: nothing to gather or merge.
+            sorted = local_data;
+        }
+        else
+        {
+            MPI_Gather(local_data, local_n, MPI_INT, all_data, local_n, MPI_INT, 0, MPI_COMM_WORLD);
 
-                int l = base, r = left_end;
-                while (l < left_end && r < right_end)
-                {
-                    if (current[l] <= current[r])
-                    {
-                        next[res_idx++] = current[l++];
-                    }
-                    else
-                    {
-                        next[res_idx++] = current[r++];
-                    }
-                }
-                while (l < left_end)
-                    next[res_idx++] = current[l++];
-                while (r < right_end)
-                    next[res_idx++] = current[r++];
+            if (rank == 0)
+            {
+                sorted = merge_sorted_runs(all_data, temp_buf, padded_count, local_n);
             }
-
-            // Swap pointers
-            int *swap = current;
-            current = next;
-            next = swap;
         }
 
-        // Copy result back to all_data if needed
-        if (current != all_data)
+        MPI_Barrier(MPI_COMM_WORLD);
+        double end = MPI_Wtime();
+        if (rank == 0 && run >= 0)
         {
-            memcpy(all_data, current, padded_count * sizeof(int));
+            samples[run] = end - start;
         }
+    }
 
+    if (rank == 0)
+    {
+        if (!is_sorted(sorted, original_count) || value_fingerprint(sorted, original_count) != fingerprint)
+        {
+            fprintf(stderr, "Output of %s is not a sorted permutation of the input\n", path);
+            MPI_Abort(MPI_COMM_WORLD, 1);
+        }
+        write_output(out, sorted, original_count);
+        printf("Input file: %s\n", path);
+        printf("Dataset size: %d\n", original_count);
+        printf("Processes: %d\n", world_size);
+        printf("Repeats: %d\n", repeats);
+        sort_samples(samples, repeats);
+        printf("Execution time (s): %.6f\n", sorted_median(samples, repeats));
+        printf("Time IQR (s): %.6f\n", sorted_iqr(samples, repeats));
+        printf("Verification: passed\n");
+        free(samples);
         free(temp_buf);
+        free(all_data);
+    }
+
+    free(local_data);
+    free(global_data);
+}
+
+int main(int argc, char **argv)
+{
+    MPI_Init(&argc, &argv);
+
+    int rank, world_size;
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+    MPI_Comm_size(MPI_COMM_WORLD, &world_size);
+
+    int warmup = 0;
+    int repeats = 1;
+    int bad_args = 0;
+    int opt;
+    opterr = (rank == 0);
+    while ((opt = getopt(argc, argv, "w:r:")) != -1)
+    {
+        if (opt == 'w')
+            bad_args |= parse_count(optarg, 0, &warmup) != 0;
+        else if (opt == 'r')
+            bad_args |= parse_count(optarg, 1, &repeats) != 0;
+        else
+            bad_args = 1;
     }
 
-    MPI_Barrier(MPI_COMM_WORLD);
-    double end = MPI_Wtime();
+    if (bad_args || optind >= argc)
+    {
+        if (rank == 0)
+        {
+            fprintf(stderr, "Usage: %s [-w warmup_runs] [-r timed_runs] <input_file> [input_file ...]\n", argv[0]);
+        }
+        MPI_Finalize();
+        return 1;
+    }
 
-    int *gathered = NULL;
+    FILE *out = NULL;
     if (rank == 0)
     {
-        gathered = all_data;
+        out = fopen("OutputFiles/mpi_output.txt", "w");
+        if (!out)
+        {
+            perror("Failed to open output file");
+        }
     }
 
-    if (rank == 0)
+    for (int arg = optind; arg < argc; ++arg)
     {
-        write_output_rank0("OutputFiles/mpi_output.txt", gathered, original_count);
-        printf("Processes: %d\n", world_size);
-        printf("Execution time (s): %.6f\n", end - start);
-        free(gathered);
+        sort_dataset(argv[arg], warmup, repeats, rank, world_size, out);
     }
 
-    free(local_data);
-    free(global_data);
+    if (out)
+    {
+        fclose(out);
+    }
 
     MPI_Finalize();
     return 0;
@@ -1,133 +1,52 @@
+#define _POSIX_C_SOURCE 200809L
+
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <limits.h>
+#include <unistd.h>
 #include <omp.h>
 
-static int next_power_of_two(int n)
-{
-    int p = 1;
-    while (p < n)
-    {
-        p <<= 1;
-    }
-    return p;
-}
-
-static int read_input(const char *path, int **out_data)
-{
-    FILE *fp = fopen(path, "r");
-    if (!fp)
-    {
-        perror("Failed to open input file");
-        return -1;
-    }
-
-    int capacity = 1024;
-    int size = 0;
-    int *buffer = malloc(capacity * sizeof(int));
-    if (!buffer)
-    {
-        fclose(fp);
-        fprintf(stderr, "Memory allocation failed\n");
-        return -1;
-    }
-
-    while (1)
-    {
-        int value;
-        int scanned = fscanf(fp, "%d", &value);
-        if (scanned == 1)
-        {
-            if (size == capacity)
-            {
-                capacity *= 2;
-                int *tmp = realloc(buffer, capacity * sizeof(int));
-                if (!tmp)
-                {
-                    free(buffer);
-                    fclose(fp);
-                    fprintf(stderr, "Memory allocation failed\n");
-                    return -1;
-                }
-                buffer = tmp;
-            }
-            buffer[size++] = value;
-        }
-        else if (scanned == EOF)
-        {
-            break;
-        }
-        else
-        {
-            free(buffer);
-            fclose(fp);
-            fprintf(stderr, "Invalid data in input file\n");
-            return -1;
-        }
-    }
-
-    fclose(fp);
-    *out_data = buffer;
-    return size;
-}
-
-static void write_output(const char *path, const int *data, int count)
-{
-    FILE *fp = fopen(path, "w");
-    if (!fp)
-    {
-        perror("Failed to open output file");
-        return;
-    }
-
-    for (int i = 0; i < count; ++i)
-    {
-        fprintf(fp, "%d%s", data[i], (i + 1 == count) ? "" : " ");
-    }
-    fprintf(fp, "\n");
-    fclose(fp);
-}
+#include "../common/bitonic_common.h"
 
 static void bitonic_sort(int *data, int n)
 {
+    int half = n >> 1;
     for (int k = 2; k <= n; k <<= 1)
     {
         for (int j = k >> 1; j > 0; j >>= 1)
         {
+            int low_mask = j - 1;
 #pragma omp parallel for schedule(static)
-            for (int i = 0; i < n; ++i)
+            for (int p = 0; p < half; ++p)
             {
-                int ixj = i ^ j;
-                if (ixj > i)
-                {
-                    int ascending = ((i & k) == 0);
-                    if ((data[i] > data[ixj]) == ascending)
-                    {
-                        int tmp = data[i];
-                        data[i] = data[ixj];
-                        data[ixj] = tmp;
-                    }
-                }
+                // Insert a zero bit at position j: i is the lower index of pair p.
+                int i = ((p & ~low_mask) << 1) | (p & low_mask);
+                int ixj = i | j;
+                int ascending = ((i & k) == 0);
+                // Branchless compare-exchange: min/max compile to conditional moves.
+                int a = data[i];
+                int b = data[ixj];
+                int lo = a < b ? a : b;
+                int hi = a < b ? b : a;
+                data[i] = ascending ? lo : hi;
+                data[ixj] = ascending ? hi : lo;
             }
         }
     }
 }
 
-int main(int argc, char **argv)
+// Sort one input file, print its timing block and append the sorted values to out.
+static int sort_dataset(const char *path, int warmup, int repeats, FILE *out)
 {
-    if (argc < 2)
-    {
-        fprintf(stderr, "Usage: %s <input_file>\n", argv[0]);
-        return 1;
-    }
-
     int *values = NULL;
-    int count = read_input(argv[1], &values);
+    int count = read_input(path, &values);
     if (count <= 0)
     {
-        return 1;
+        return -1;
     }
 
+    unsigned long long fingerprint = value_fingerprint(values, count);
     int padded = next_power_of_two(count);
     if (padded != count)
     {
@@ -136,7 +55,7 @@ int main(int argc, char **argv)
         {
             free(values);
             fprintf(stderr, "Memory allocation failed\n");
-            return 1;
+            return -1;
         }
         values = tmp;
         for (int i = count; i < padded; ++i)
@@ -145,17 +64,96 @@ int main(int argc, char **argv)
         }
     }
 
-    double start = omp_get_wtime();
-    bitonic_sort(values, padded);
-    double end = omp_get_wtime();
+    int *work = malloc(padded * sizeof(int));
+    double *samples = malloc(repeats * sizeof(double));
+    if (!work || !samples)
+    {
+        free(work);
+        free(samples);
+        free(values);
+        fprintf(stderr, "Memory allocation failed\n");
+        return -1;
+    }
+
+    // Negative run indices are warm-ups and are not recorded.
+    for (int run = -warmup; run < repeats; ++run)
+    {
+        memcpy(work, values, padded * sizeof(int));
+        double start = omp_get_wtime();
+        bitonic_sort(work, padded);
+        double end = omp_get_wtime();
+        if (run >= 0)
+        {
+            samples[run] = end - start;
+        }
+    }
 
     int threads_used = omp_get_max_threads();
+    printf("Input file: %s\n", path);
     printf("Dataset size: %d\n", count);
     printf("Threads: %d\n", threads_used);
-    printf("Execution time (s): %.6f\n", end - start);
+    printf("Repeats: %d\n", repeats);
+    sort_samples(samples, repeats);
+    printf("Execution time (s): %.6f\n", sorted_median(samples, repeats));
+    printf("Time IQR (s): %.6f\n", sorted_iqr(samples, repeats));
 
-    write_output("OutputFiles/openmp_output.txt", values, count);
+    int verified = is_sorted(work, count) && value_fingerprint(work, count) == fingerprint;
+    printf("Verification: %s\n", verified ? "passed" : "FAILED");
+    if (verified)
+    {
+        write_output(out, work, count);
+    }
+    else
+    {
+        fprintf(stderr, "Output of %s is not a sorted permutation of the input\n", path);
+    }
 
+    free(samples);
+    free(work);
     free(values);
-    return 0;
+    return verified ? 0 : -1;
+}
+
+int main(int argc, char **argv)
+{
+    int warmup = 0;
+    int repeats = 1;
+    int bad_args = 0;
+    int opt;
+    while ((opt = getopt(argc, argv, "w:r:")) != -1)
+    {
+        if (opt == 'w')
+            bad_args |= parse_count(optarg, 0, &warmup) != 0;
+        else if (opt == 'r')
+            bad_args |= parse_count(optarg, 1, &repeats) != 0;
+        else
+            bad_args = 1;
+    }
+
+    if (bad_args || optind >= argc)
+    {
+        fprintf(stderr, "Usage: %s [-w warmup_runs] [-r timed_runs] <input_file> [input_file ...]\n", argv[0]);
+        return 1;
+    }
+
+    FILE *out = fopen("OutputFiles/openmp_output.txt", "w");
+    if (!out)
+    {
+        perror("Failed to open output file");
+    }
+
+    int status = 0;
+    for (int arg = optind; arg < argc && status == 0; ++arg)
+    {
+        if (sort_dataset(argv[arg], warmup, repeats, out) != 0)
+        {
+            status = 1;
+        }
+    }
+
+    if (out)
+    {
+        fclose(out);
+    }
+    return status;
 }
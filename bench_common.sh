@@ -0,0 +1,85 @@
+# Shared setup and helpers for run_openmp.sh and run_mpi.sh.
+# All paths are relative to the repository root, which the scripts must be run from.
+# Source with the script's arguments: source ./bench_common.sh "$@"
+
+if [[ $# -gt 0 ]]; then
+    INPUTS=("$@")
+else
+    INPUTS=(InputFiles/input.txt)
+fi
+TOTAL_ELEMENTS=$(cat "${INPUTS[@]}" | wc -w)
+WARMUP=${WARMUP:-1}
+# Five timed runs, one fewer per 4096 elements down to three, to bound wall time on large inputs.
+REPEATS=${REPEATS:-$(( TOTAL_ELEMENTS / 4096 >= 2 ? 3 : 5 - TOTAL_ELEMENTS / 4096 ))}
+CPU_COUNT=$(getconf _NPROCESSORS_ONLN 2> /dev/null || echo 1)
+TIME_RE='Execution time \(s\): ([0-9.]+)'
+IQR_RE='Time IQR \(s\): ([0-9.]+)'
+# Size-based ceiling per launch: grows like n log^2 n per timed or warm-up sort, plus start-up slack.
+MAX_RUN_TIMEOUT=${RUN_TIMEOUT:-$(awk -v n="$TOTAL_ELEMENTS" -v runs=$((WARMUP + REPEATS)) \
+    'BEGIN { l = (n > 1) ? log(n) / log(2) : 1; printf "%d", 5 + runs * 2e-6 * n * l * l + 0.5 }')}
+RUN_TIMEOUT_FIXED=${RUN_TIMEOUT:+1}
+RUN_TIMEOUT=$MAX_RUN_TIMEOUT
+
+mkdir -p OutputFiles
+
+# timeout(1) signals its whole process group, so mpirun and its ranks go down together;
+# -k escalates to SIGKILL if the TERM is ignored.
+run_limited() {
+    if command -v timeout > /dev/null; then
+        timeout -k 5 "$RUN_TIMEOUT" "$@"
+    else
+        "$@"
+    fi
+}
+
+# adapt_timeout <seconds>: after a successful launch, allow the next one 3x its duration
+# plus slack, never more than the size-based ceiling. A user-set RUN_TIMEOUT stays fixed.
+adapt_timeout() {
+    if [[ -z $RUN_TIMEOUT_FIXED ]]; then
+        RUN_TIMEOUT=$((3 * $1 + 5))
+        if (( RUN_TIMEOUT > MAX_RUN_TIMEOUT )); then
+            RUN_TIMEOUT=$MAX_RUN_TIMEOUT
+        fi
+    fi
+}
+
+# build_if_changed <label> <source> <exe> <stamp> <compile command...>
+# The stamp covers the compile command, the source, the shared helper header and the built
+# executable, so a binary replaced behind the script's back (e.g. by a checkout) is rebuilt.
+build_if_changed() {
+    local label=$1 src=$2 exe=$3 stamp=$4
+    shift 4
+    local build_id exe_sum=
+    build_id=$( { echo "$*"; cat "$src" common/bitonic_common.h; } | cksum)
+    if [[ -f $exe ]]; then
+        exe_sum=$(cksum < "$exe")
+    fi
+    if [[ "${FORCE_BUILD:-0}" == 1 || ! -x "$exe" || ! -f "$stamp" || "$(< "$stamp")" != "$build_id $exe_sum" ]]; then
+        echo "Building $label version..."
+        "$@"
+        echo "$build_id $(cksum < "$exe")" > "$stamp"
+    else
+        echo "$label version is up to date, skipping build."
+    fi
+}
+
+# timing_row <count> <run output> [pattern]: prints the count followed by one value per
+# input file, captured by pattern (default: the median time).
+timing_row() {
+    local row=$1 pattern=${3:-$TIME_RE} line
+    while IFS= read -r line; do
+        if [[ $line =~ $pattern ]]; then
+            row+=" ${BASH_REMATCH[1]}"
+        fi
+    done <<< "$2"
+    echo "$row"
+}
+
+# failed_row <count>: prints the count followed by FAILED in place of each input's time.
+failed_row() {
+    local row=$1 input
+    for input in "${INPUTS[@]}"; do
+        row+=" FAILED"
+    done
+    echo "$row"
+}
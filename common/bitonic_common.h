@@ -0,0 +1,250 @@
+// Helpers shared by the OpenMP and MPI bitonic sorts: argument parsing, timing
+// statistics and whole-file integer input/output.
+#ifndef BITONIC_COMMON_H
+#define BITONIC_COMMON_H
+
+#include <ctype.h>
+#include <errno.h>
+#include <limits.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+static int next_power_of_two(int n)
+{
+    int p = 1;
+    while (p < n)
+    {
+        p <<= 1;
+    }
+    return p;
+}
+
+static int parse_count(const char *text, int min_value, int *out_value)
+{
+    char *end = NULL;
+    long value = strtol(text, &end, 10);
+    if (end == text || *end != '\0' || value < min_value || value > INT_MAX)
+    {
+        return -1;
+    }
+    *out_value = (int)value;
+    return 0;
+}
+
+// Insertion sort of the timing samples in place; there are only a handful of them.
+static void sort_samples(double *samples, int count)
+{
+    for (int i = 1; i < count; ++i)
+    {
+        double value = samples[i];
+        int j = i - 1;
+        while (j >= 0 && samples[j] > value)
+        {
+            samples[j + 1] = samples[j];
+            --j;
+        }
+        samples[j + 1] = value;
+    }
+}
+
+static double sorted_median(const double *sorted, int count)
+{
+    if (count % 2 == 1)
+    {
+        return sorted[count / 2];
+    }
+    return 0.5 * (sorted[count / 2 - 1] + sorted[count / 2]);
+}
+
+// Returns 1 if data is in non-decreasing order; run once per dataset after the timed runs.
+static int is_sorted(const int *data, int count)
+{
+    for (int i = 1; i < count; ++i)
+    {
+        if (data[i - 1] > data[i])
+        {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+// Order-independent fingerprint of the values (wrapping sum mixed with xor). A correct sort
+// leaves it unchanged; a lost or duplicated value almost surely does not.
+static unsigned long long value_fingerprint(const int *data, int count)
+{
+    unsigned long long sum = 0;
+    unsigned int bits = 0;
+    for (int i = 0; i < count; ++i)
+    {
+        sum += (unsigned long long)(long long)data[i];
+        bits ^= (unsigned int)data[i];
+    }
+    return sum ^ ((unsigned long long)bits << 32);
+}
+
+// Interquartile range: spread between the medians of the lower and upper halves.
+static double sorted_iqr(const double *sorted, int count)
+{
+    if (count < 2)
+    {
+        return 0.0;
+    }
+    int half = count / 2;
+    return sorted_median(sorted + count - half, half) - sorted_median(sorted, half);
+}
+
+static int read_input(const char *path, int **out_data)
+{
+    FILE *fp = fopen(path, "rb");
+    if (!fp)
+    {
+        perror("Failed to open input file");
+        return -1;
+    }
+
+    // Load the whole file, then parse it in a single strtol pass.
+    size_t text_capacity = 1 << 16;
+    size_t text_size = 0;
+    char *text = malloc(text_capacity);
+    while (text)
+    {
+        text_size += fread(text + text_size, 1, text_capacity - text_size - 1, fp);
+        if (text_size + 1 < text_capacity)
+        {
+            break;
+        }
+        text_capacity *= 2;
+        char *tmp = realloc(text, text_capacity);
+        if (!tmp)
+        {
+            free(text);
+        }
+        text = tmp;
+    }
+    int read_failed = ferror(fp);
+    fclose(fp);
+    if (!text)
+    {
+        fprintf(stderr, "Memory allocation failed\n");
+        return -1;
+    }
+    if (read_failed)
+    {
+        free(text);
+        fprintf(stderr, "Failed to read input file\n");
+        return -1;
+    }
+    text[text_size] = '\0';
+
+    int capacity = 1024;
+    int size = 0;
+    int *buffer = malloc(capacity * sizeof(int));
+    if (!buffer)
+    {
+        free(text);
+        fprintf(stderr, "Memory allocation failed\n");
+        return -1;
+    }
+
+    const char *cursor = text;
+    while (1)
+    {
+        while (isspace((unsigned char)*cursor))
+        {
+            ++cursor;
+        }
+        if (*cursor == '\0')
+        {
+            break;
+        }
+
+        char *end = NULL;
+        errno = 0;
+        long value = strtol(cursor, &end, 10);
+        if (end == cursor || errno == ERANGE || value < INT_MIN || value > INT_MAX ||
+            (*end != '\0' && !isspace((unsigned char)*end)))
+        {
+            free(buffer);
+            free(text);
+            fprintf(stderr, "Invalid data in input file\n");
+            return -1;
+        }
+        cursor = end;
+
+        if (size == capacity)
+        {
+            capacity *= 2;
+            int *tmp = realloc(buffer, capacity * sizeof(int));
+            if (!tmp)
+            {
+                free(buffer);
+                free(text);
+                fprintf(stderr, "Memory allocation failed\n");
+                return -1;
+            }
+            buffer = tmp;
+        }
+        buffer[size++] = (int)value;
+    }
+
+    free(text);
+    *out_data = buffer;
+    return size;
+}
+
+// Write the decimal digits of value to dst (no terminator); returns the number of characters.
+static int format_int(char *dst, int value)
+{
+    char digits[10];
+    unsigned int magnitude = value < 0 ? 0u - (unsigned int)value : (unsigned int)value;
+    int n = 0;
+    do
+    {
+        digits[n++] = (char)('0' + magnitude % 10);
+        magnitude /= 10;
+    } while (magnitude != 0);
+
+    int length = 0;
+    if (value < 0)
+    {
+        dst[length++] = '-';
+    }
+    while (n > 0)
+    {
+        dst[length++] = digits[--n];
+    }
+    return length;
+}
+
+// Format the whole line into one buffer and emit it with a single fwrite.
+static void write_output(FILE *fp, const int *data, int count)
+{
+    if (!fp)
+    {
+        return;
+    }
+
+    // At most 11 characters per int ("-2147483648") plus a separator or the final newline.
+    char *text = malloc((size_t)count * 12 + 1);
+    if (!text)
+    {
+        fprintf(stderr, "Memory allocation failed\n");
+        return;
+    }
+
+    char *pos = text;
+    for (int i = 0; i < count; ++i)
+    {
+        if (i > 0)
+        {
+            *pos++ = ' ';
+        }
+        pos += format_int(pos, data[i]);
+    }
+    *pos++ = '\n';
+    fwrite(text, 1, (size_t)(pos - text), fp);
+    free(text);
+}
+
+#endif // BITONIC_COMMON_H
@@ -1,23 +1,46 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-INPUT=${1:-InputFiles/input.txt}
+source ./bench_common.sh "$@"
+
+SRC=MPI/bitonic_mpi.c
 EXE=MPI/bitonic_mpi
+STAMP=MPI/.bitonic_mpi.stamp
 RESULTS=OutputFiles/mpi_times.txt
+IQR_RESULTS=OutputFiles/mpi_iqr.txt
+MAX_PROCS=${MAX_PROCS:-$((2 * CPU_COUNT))}
 MPI_RUN_OPTS=${MPI_RUN_OPTS:---oversubscribe}
+read -r -a MPI_RUN_ARGS <<< "$MPI_RUN_OPTS"
 
-mkdir -p OutputFiles
-
-echo "Building MPI version..."
-mpicc -O2 -std=c11 MPI/bitonic_mpi.c -o "$EXE"
+build_if_changed MPI "$SRC" "$EXE" "$STAMP" mpicc -O2 -std=c11 "$SRC" -o "$EXE"
 
-echo "Input file: $INPUT" > "$RESULTS"
+failed=0
+exec 3> "$RESULTS" 4> "$IQR_RESULTS"
+echo "Input file: ${INPUTS[*]}" >&3
+echo "Input file: ${INPUTS[*]}" >&4
 for p in 1 2 4 8 16; do
+    if (( p > MAX_PROCS )); then
+        echo "Skipping $p process(es): above MAX_PROCS=$MAX_PROCS."
+        continue
+    fi
     echo "Running with $p process(es)..."
-    run_output=$(mpirun $MPI_RUN_OPTS -np "$p" "$EXE" "$INPUT")
+    run_start=$SECONDS
+    if ! run_output=$(run_limited mpirun "${MPI_RUN_ARGS[@]}" -np "$p" "$EXE" -w "$WARMUP" -r "$REPEATS" "${INPUTS[@]}"); then
+        echo "Run with $p process(es) failed or exceeded ${RUN_TIMEOUT}s; skipping." >&2
+        failed_row "$p" >&3
+        failed_row "$p" >&4
+        failed=1
+        continue
+    fi
+    adapt_timeout $((SECONDS - run_start))
     echo "$run_output"
-    exec_time=$(echo "$run_output" | awk '/Execution time/ {print $4}')
-    echo "$p $exec_time" >> "$RESULTS"
+    timing_row "$p" "$run_output" >&3
+    timing_row "$p" "$run_output" "$IQR_RE" >&4
 done
+exec 3>&- 4>&-
 
-echo "Execution times saved to $RESULTS"
+echo "Execution times saved to $RESULTS, interquartile ranges to $IQR_RESULTS"
+if (( failed )); then
+    echo "Some runs failed; see FAILED rows." >&2
+    exit 1
+fi
@@ -1,25 +1,49 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-INPUT=${1:-InputFiles/input.txt}
+source ./bench_common.sh "$@"
+
+SRC=OpenMP/bitonic_openmp.c
 EXE=OpenMP/bitonic_openmp
+STAMP=OpenMP/.bitonic_openmp.stamp
 RESULTS=OutputFiles/openmp_times.txt
+IQR_RESULTS=OutputFiles/openmp_iqr.txt
+MAX_THREADS=${MAX_THREADS:-$CPU_COUNT}
+export OMP_PROC_BIND=${OMP_PROC_BIND:-close}
+export OMP_PLACES=${OMP_PLACES:-cores}
 
-mkdir -p OutputFiles
-
-echo "Building OpenMP version..."
 CC=${CC:-clang}
-OMP_FLAGS="-Xpreprocessor -fopenmp -I/opt/homebrew/opt/libomp/include -L/opt/homebrew/opt/libomp/lib -lomp"
-"$CC" -O2 -std=c11 $OMP_FLAGS OpenMP/bitonic_openmp.c -o "$EXE"
+OMP_FLAGS=(-Xpreprocessor -fopenmp -I/opt/homebrew/opt/libomp/include -L/opt/homebrew/opt/libomp/lib -lomp)
+build_if_changed OpenMP "$SRC" "$EXE" "$STAMP" "$CC" -O2 -std=c11 "${OMP_FLAGS[@]}" "$SRC" -o "$EXE"
 
-echo "Input file: $INPUT" > "$RESULTS"
+failed=0
+exec 3> "$RESULTS" 4> "$IQR_RESULTS"
+echo "Input file: ${INPUTS[*]}" >&3
+echo "Input file: ${INPUTS[*]}" >&4
 for t in 1 2 4 8 16; do
+    if (( t > MAX_THREADS )); then
+        echo "Skipping $t thread(s): above MAX_THREADS=$MAX_THREADS."
+        continue
+    fi
     export OMP_NUM_THREADS=$t
     echo "Running with $t thread(s)..."
-    run_output=$("$EXE" "$INPUT")
+    run_start=$SECONDS
+    if ! run_output=$(run_limited "$EXE" -w "$WARMUP" -r "$REPEATS" "${INPUTS[@]}"); then
+        echo "Run with $t thread(s) failed or exceeded ${RUN_TIMEOUT}s; skipping." >&2
+        failed_row "$t" >&3
+        failed_row "$t" >&4
+        failed=1
+        continue
+    fi
+    adapt_timeout $((SECONDS - run_start))
     echo "$run_output"
-    exec_time=$(echo "$run_output" | awk '/Execution time/ {print $4}')
-    echo "$t $exec_time" >> "$RESULTS"
+    timing_row "$t" "$run_output" >&3
+    timing_row "$t" "$run_output" "$IQR_RE" >&4
 done
+exec 3>&- 4>&-
 
-echo "Execution times saved to $RESULTS"
+echo "Execution times saved to $RESULTS, interquartile ranges to $IQR_RESULTS"
+if (( failed )); then
+    echo "Some runs failed; see FAILED rows." >&2
+    exit 1
+fi